@@ -1,7 +1,46 @@
 import os
 
+from crawler import TorrentCrawler
 
-def run_server(server_factory):
+
+def create_sinks(writer_names):
+    sink_batch_size = int(os.getenv("SINK_BATCH_SIZE", "100"))
+
+    sinks = []
+
+    for name in writer_names:
+        if name == "file":
+            from sinks import FileSink
+
+            sinks.append(FileSink(
+                folder_path=os.getenv("TORRENTS_FOLDER"),
+                batch_size=sink_batch_size
+            ))
+
+        elif name == "mongo":
+            from sinks_mongo import MongoSink
+
+            sinks.append(MongoSink(
+                db_url=os.getenv("MONGO_URI"),
+                db_name=os.getenv("MONGO_DB_NAME"),
+                batch_size=sink_batch_size
+            ))
+
+        elif name == "jsonl":
+            from sinks import JsonLinesSink
+
+            sinks.append(JsonLinesSink(
+                file_path=os.getenv("JSONL_EXPORT_PATH", "torrents.jsonl.gz"),
+                batch_size=sink_batch_size
+            ))
+
+        else:
+            raise ValueError("Wrong 'CRAWLER_WRITER' value: {}".format(name))
+
+    return sinks
+
+
+def run_server(sinks):
     initial_nodes = [
         ("67.215.246.10", 6881),  # router.bittorrent.com
         ("87.98.162.88", 6881),  # dht.transmissionbt.com
@@ -15,11 +54,23 @@ def run_server(server_factory):
     download_bandwidth = int(os.getenv("DOWNLOAD_BANDWIDTH", "0"))
     upload_bandwidth = int(os.getenv("UPLOAD_BANDWIDTH", "0"))
 
-    server = server_factory(
+    executor_workers = os.getenv("EXECUTOR_WORKERS")  # None = cpu count, 0 = run inline
+    executor_workers = int(executor_workers) if executor_workers else None
+    executor_queue_size = int(os.getenv("EXECUTOR_QUEUE_SIZE", "64"))
+
+    sink_queue_size = int(os.getenv("SINK_QUEUE_SIZE", "1024"))
+    sink_flush_interval = float(os.getenv("SINK_FLUSH_INTERVAL", "1.0"))
+
+    server = TorrentCrawler(
+        sinks=sinks,
+        sink_queue_size=sink_queue_size,
+        sink_flush_interval=sink_flush_interval,
         bootstrap_nodes=initial_nodes,
         miner_interval=miner_interval,
         download_speed=download_bandwidth,
-        upload_speed=upload_bandwidth
+        upload_speed=upload_bandwidth,
+        executor_workers=executor_workers,
+        executor_queue_size=executor_queue_size
     )
     server.run(
         host=socket_host,
@@ -28,28 +79,12 @@ def run_server(server_factory):
 
 
 if __name__ == '__main__':
-    crawler_name = os.getenv("CRAWLER_WRITER", "file")
-
-    if crawler_name == "file":
-        from crawler_file import TorrentCrawlerFile
-
-        run_server(
-            lambda **kwargs: TorrentCrawlerFile(
-                folder_path=os.getenv("TORRENTS_FOLDER"),
-                **kwargs
-            )
-        )
-
-    elif crawler_name == "mongo":
-        from crawler_mongo import TorrentCrawlerMongo
-
-        run_server(
-            lambda **kwargs: TorrentCrawlerMongo(
-                db_url=os.getenv("MONGO_URI"),
-                db_name=os.getenv("MONGO_DB_NAME"),
-                **kwargs
-            )
-        )
+    # Comma separated list of sinks, e.g. "file,mongo,jsonl"
+    writers = [name.strip() for name in os.getenv("CRAWLER_WRITER", "file").split(",") if name.strip()]
 
+    try:
+        crawler_sinks = create_sinks(writers)
+    except ValueError as e:
+        print(e)
     else:
-        print("Wrong 'CRAWLER_WRITER' value")
+        run_server(crawler_sinks)
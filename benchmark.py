@@ -0,0 +1,98 @@
+"""
+Event loop stall benchmark for torrent post-processing.
+
+Runs sha1 verification and infodict decoding on synthetic torrents, inline and through a process pool,
+while a ticker coroutine measures how late the loop wakes it up.
+
+    python benchmark.py
+"""
+import asyncio
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+
+from bencode import bencode
+
+from utils import verify_metadata, parse_torrent_metadata
+
+TICK = 0.001
+JOBS = 10
+
+
+def make_metadata(files_count):
+    # Mixed-charset names, so chardet has real work to do
+    return bencode({
+        "name": "Сборник {}".format(files_count).encode("cp1251"),
+        "piece length": 262144,
+        "pieces": bytes(20 * files_count),
+        "files": [
+            {
+                "length": 1024 * i,
+                "path": [b"disk 1", "трек {:05} — тест.mp3".format(i).encode("utf-8")]
+            }
+            for i in range(files_count)
+        ]
+    })
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        started = asyncio.get_event_loop().time()
+        await asyncio.sleep(TICK)
+        lags.append(asyncio.get_event_loop().time() - started - TICK)
+
+
+async def measure(executor, func, *args):
+    loop = asyncio.get_event_loop()
+    lags, stop = [], asyncio.Event()
+    tick_task = asyncio.ensure_future(ticker(lags, stop))
+
+    elapsed = 0.0
+    for _ in range(JOBS):
+        started = loop.time()
+        if executor is None:
+            func(*args)
+        else:
+            await loop.run_in_executor(executor, func, *args)
+        elapsed += loop.time() - started
+
+        # Let the ticker catch up, so every lag sample covers a single job
+        await asyncio.sleep(TICK * 5)
+
+    stop.set()
+    await tick_task
+
+    if not lags:
+        return 0.0, 0.0, 0.0, elapsed / JOBS
+
+    lags.sort()
+    return lags[-1], lags[int(len(lags) * 0.99)], statistics.mean(lags), elapsed / JOBS
+
+
+def main():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    executor = ProcessPoolExecutor(1)
+    loop.run_until_complete(loop.run_in_executor(executor, abs, 0))  # Warm up worker
+
+    print("{:<8} {:>9} {:<7} {:>10} {:>10} {:>10} {:>10}".format(
+        "task", "size", "mode", "max lag", "p99 lag", "mean lag", "per job"))
+
+    for files_count in (100, 1000, 5000):
+        metadata = make_metadata(files_count)
+        info_hash = sha1(metadata).digest()
+
+        for name, func, args in (("sha1", verify_metadata, (info_hash, metadata)),
+                                 ("decode", parse_torrent_metadata, (metadata,))):
+            for mode, pool in (("inline", None), ("pool", executor)):
+                max_lag, p99_lag, mean_lag, per_job = loop.run_until_complete(measure(pool, func, *args))
+                print("{:<8} {:>8}K {:<7} {:>8.2f}ms {:>8.2f}ms {:>8.2f}ms {:>8.2f}ms".format(
+                    name, len(metadata) // 1024, mode,
+                    max_lag * 1000, p99_lag * 1000, mean_lag * 1000, per_job * 1000))
+
+    executor.shutdown()
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
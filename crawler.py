@@ -1,15 +1,71 @@
 import asyncio
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
 
+from sinks import SinkPipeline
 from spyder import DHTSpyder
 from torrent import BitTorrentProtocol
+from utils import verify_metadata, parse_torrent_metadata, hexlify
+
+
+class ExecutorBusyException(Exception):
+    pass
 
 
 class TorrentCrawler(DHTSpyder):
-    def __init__(self, **kwargs):
+    def __init__(self, sinks, sink_queue_size=1024, sink_flush_interval=1.0, executor_workers=None,
+                 executor_queue_size=64, **kwargs):
         super().__init__(**kwargs)
 
         self.torrent_in_progress = set()  # For prevent multiple search same torrents
 
+        # Only sinks which need files/name decode metadata, through the executor
+        self.sink_pipeline = SinkPipeline(sinks, partial(self.run_in_executor, parse_torrent_metadata),
+                                          decode_concurrency=executor_queue_size,
+                                          transient_errors=(ExecutorBusyException,), queue_size=sink_queue_size,
+                                          flush_interval=sink_flush_interval)
+
+        # CPU-heavy post-processing (bdecode, charset detection) runs in a process pool,
+        # so the event loop only does I/O; executor_workers=0 keeps it inline.
+        # sha1 stays inline, it is cheaper than sending metadata to a worker (see benchmark.py)
+        self.executor = ProcessPoolExecutor(executor_workers) if executor_workers != 0 else None
+        self.executor_queue_size = executor_queue_size
+        self.executor_jobs = 0
+
+    def run(self, **kwargs):
+        try:
+            super().run(**kwargs)
+        finally:
+            # Write out everything already queued, it needs the executor for decoding
+            self.loop.run_until_complete(self.sink_pipeline.close())
+
+            if self.executor is not None:
+                self.executor.shutdown()
+
+    async def run_in_executor(self, func, *args):
+        if self.executor is None:
+            return func(*args)
+
+        # Bounded submission queue: caller is pushed back instead of piling up jobs
+        if self.executor_jobs >= self.executor_queue_size:
+            raise ExecutorBusyException("Executor queue is full")
+
+        self.executor_jobs += 1
+        try:
+            return await self.loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.executor_jobs -= 1
+
+    def connection_made(self):
+        super().connection_made()
+
+        # Stop loop on "docker stop", so run() can flush sinks
+        self.loop.add_signal_handler(signal.SIGTERM, self.loop.stop)
+
+        self.sink_pipeline.start(self.loop)
+
     async def create_connection(self, host, port, info_hash, result_future):
         return await self.loop.create_connection(
             lambda: BitTorrentProtocol(info_hash, result_future),
@@ -20,21 +76,34 @@ class TorrentCrawler(DHTSpyder):
         try:
             result_future = self.loop.create_future()
             await self.create_connection(peer.host, peer.port, info_hash, result_future)
-            return await result_future
+            metadata = await result_future
         except:
             return None
 
+        return metadata if verify_metadata(info_hash, metadata) else None
+
     async def wait_for_torrent(self, info_hash, peers):
-        # Wait for 1 minute for torrent completion
-        done, pending = await asyncio.wait([
-            self.connect_to_peer(peer, info_hash)
-            for peer in peers
-        ], timeout=60.0, return_when=asyncio.FIRST_COMPLETED, loop=self.loop)
+        # Wait for 1 minute for torrent completion, peers without (valid) metadata do not stop the others
+        pending = [asyncio.ensure_future(self.connect_to_peer(peer, info_hash), loop=self.loop) for peer in peers]
+        deadline = self.loop.time() + 60.0
 
-        for task in pending:
-            task.cancel()
+        try:
+            while pending:
+                timeout = deadline - self.loop.time()
+                if timeout <= 0:
+                    break
 
-        return await done.pop() if done else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED,
+                                                   loop=self.loop)
+
+                for task in done:
+                    if task.result():
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return None
 
     async def connect_with_peers(self, info_hash, peers):
         for i in range(0, len(peers), 20):
@@ -44,15 +113,22 @@ class TorrentCrawler(DHTSpyder):
                 continue
             else:
                 if metadata:
-                    asyncio.ensure_future(self.save_torrent_metadata(info_hash, metadata), loop=self.loop)
+                    await self.save_torrent_metadata(info_hash, metadata)
                     break
 
         if info_hash in self.torrent_in_progress:
             self.torrent_in_progress.remove(info_hash)
 
     async def enqueue_torrent(self, info_hash):
-        if info_hash not in self.torrent_in_progress:
-            self.torrent_in_progress.add(info_hash)
+        # Do not start new searches while sinks are behind (backpressure)
+        if info_hash in self.torrent_in_progress or self.sink_pipeline.full():
+            return
+
+        self.torrent_in_progress.add(info_hash)
+
+        if await self.sink_pipeline.contains(hexlify(info_hash)):
+            self.torrent_in_progress.remove(info_hash)
+        else:
             self.search_peers(info_hash)
 
     async def get_peers_received(self, node_id, info_hash, addr):
@@ -65,4 +141,8 @@ class TorrentCrawler(DHTSpyder):
         await self.connect_with_peers(info_hash, list(peers))
 
     async def save_torrent_metadata(self, info_hash, metadata):
-        pass
+        await self.sink_pipeline.put({
+            "info_hash": hexlify(info_hash),
+            "metadata": metadata,
+            "timestamp": datetime.now()
+        })
@@ -0,0 +1,264 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class Sink(ABC):
+    # Sinks with decode_metadata get item["decoded"] = {"files": ..., "name": ...}, undecodable torrents are skipped
+    decode_metadata = False
+
+    def __init__(self, batch_size=1):
+        self.batch_size = batch_size
+
+    async def open(self):
+        pass
+
+    async def contains(self, info_hash):
+        # None means "unknown", such sink does not take part in deduplication
+        return None
+
+    @abstractmethod
+    async def write(self, items):
+        pass
+
+
+class FileSink(Sink):
+    def __init__(self, folder_path, **kwargs):
+        super().__init__(**kwargs)
+
+        self.folder_path = folder_path
+
+    def get_path_for_torrent(self, info_hash):
+        return os.path.join(self.folder_path, info_hash + ".torrent")
+
+    def _write_files(self, items):
+        for item in items:
+            with open(self.get_path_for_torrent(item["info_hash"]), "wb") as file:
+                file.write(item["metadata"])
+
+    async def contains(self, info_hash):
+        # Single stat is cheaper than a round trip through the thread pool
+        return os.path.exists(self.get_path_for_torrent(info_hash))
+
+    async def write(self, items):
+        # Disk I/O is done in the default thread pool, so it never blocks the event loop
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write_files, items)
+
+
+class JsonLinesSink(Sink):
+    decode_metadata = True
+
+    def __init__(self, file_path, **kwargs):
+        super().__init__(**kwargs)
+
+        self.file_path = file_path
+        self.info_hashes = None  # Unknown until export is read in open()
+
+    def _read_info_hashes(self):
+        info_hashes = set()
+
+        if not os.path.exists(self.file_path):
+            return info_hashes
+
+        try:
+            with gzip.open(self.file_path, "rt", encoding="utf-8") as file:
+                for line in file:
+                    info_hashes.add(json.loads(line)["info_hash"])
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            logger.warning("%s is damaged, %d torrents read: %r", self.file_path, len(info_hashes), e)
+
+        return info_hashes
+
+    def _write_lines(self, items):
+        lines = "".join(
+            json.dumps({
+                "info_hash": item["info_hash"],
+                "files": item["decoded"]["files"],
+                "name": item["decoded"]["name"],
+                "timestamp": item["timestamp"].isoformat()
+            }, ensure_ascii=False) + "\n"
+            for item in items
+        )
+
+        # Whole batch is appended as single gzip member with one write, so a failed batch can not leave
+        # a half-written member behind; concatenated members are still valid gzip
+        with open(self.file_path, "ab") as file:
+            file.write(gzip.compress(lines.encode("utf-8")))
+
+    async def open(self):
+        loop = asyncio.get_event_loop()
+        self.info_hashes = await loop.run_in_executor(None, self._read_info_hashes)
+
+    async def contains(self, info_hash):
+        return None if self.info_hashes is None else info_hash in self.info_hashes
+
+    async def write(self, items):
+        if self.info_hashes is not None:
+            items = [item for item in items if item["info_hash"] not in self.info_hashes]
+
+        if items:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self._write_lines, items)
+
+            if self.info_hashes is not None:
+                self.info_hashes.update(item["info_hash"] for item in items)
+
+
+class SinkPipeline:
+    def __init__(self, sinks, decoder, decode_concurrency=64, transient_errors=(), queue_size=1024,
+                 flush_interval=1.0, retries=3, retry_delay=1.0):
+        self.sinks = sinks
+        self.decoder = decoder
+        self.decode_concurrency = decode_concurrency
+        self.transient_errors = transient_errors
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self.loop = None
+        self.queue = None
+        self.sink_queues = []
+        self.decode_slots = None
+
+    def start(self, loop):
+        self.loop = loop
+
+        self.queue = asyncio.Queue(self.queue_size, loop=self.loop)
+        self.sink_queues = [asyncio.Queue(self.queue_size, loop=self.loop) for _ in self.sinks]
+        self.decode_slots = asyncio.Semaphore(self.decode_concurrency, loop=self.loop)
+
+        asyncio.ensure_future(self._dispatch(), loop=self.loop)
+
+        for sink, queue in zip(self.sinks, self.sink_queues):
+            asyncio.ensure_future(self._consume(sink, queue), loop=self.loop)
+
+    async def _join(self):
+        # Shared queue first, it is dispatched into sink queues
+        await self.queue.join()
+        await asyncio.gather(*(queue.join() for queue in self.sink_queues), loop=self.loop)
+
+    async def close(self, timeout=30.0):
+        # Wait until everything queued is written (or dropped after retries)
+        if self.queue is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._join(), timeout, loop=self.loop)
+        except asyncio.TimeoutError:
+            logger.error("Sinks are not flushed in %.1fs, %d torrents lost", timeout,
+                         self.queue.qsize() + max((queue.qsize() for queue in self.sink_queues), default=0))
+
+    def full(self):
+        # Any lagging sink pauses the producer, but does not block other sinks
+        return self.queue.full() or any(queue.full() for queue in self.sink_queues)
+
+    async def put(self, item):
+        # Blocks while queue is full, slow sinks push back to the producer
+        await self.queue.put(item)
+
+    async def contains(self, info_hash):
+        results = [
+            result
+            for result in await asyncio.gather(*(sink.contains(info_hash) for sink in self.sinks),
+                                               loop=self.loop, return_exceptions=True)
+            if isinstance(result, bool)
+        ]
+
+        return bool(results) and all(results)
+
+    async def _dispatch(self):
+        while True:
+            item = await self.queue.get()
+
+            for sink, queue in zip(self.sinks, self.sink_queues):
+                try:
+                    queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    logger.error("%s queue is full, torrent %s dropped", type(sink).__name__, item["info_hash"])
+
+            self.queue.task_done()
+
+    async def _decode_item(self, item):
+        async with self.decode_slots:
+            try:
+                files, name = await self.decoder(item["metadata"])
+            except self.transient_errors:
+                raise
+            except Exception as e:
+                logger.warning("Can not decode torrent %s: %s", item["info_hash"], type(e).__name__)
+                item["decoded"] = None
+            else:
+                item["decoded"] = {"files": files, "name": name}
+
+    async def _decode(self, items):
+        # Every item is decoded once, the task is shared by all sinks which need it
+        tasks = []
+        for item in items:
+            task = item.get("decode_task")
+
+            # E.g. busy executor, such item is decoded again on retry
+            if task is None or (task.done() and "decoded" not in item):
+                task = item["decode_task"] = asyncio.ensure_future(self._decode_item(item), loop=self.loop)
+
+            tasks.append(task)
+
+        # Whole batch is decoded in parallel, decode_slots keep it within executor queue size
+        for result in await asyncio.gather(*tasks, loop=self.loop, return_exceptions=True):
+            if isinstance(result, Exception):
+                raise result
+
+        return [item for item in items if item["decoded"] is not None]
+
+    async def _write(self, sink, items):
+        if sink.decode_metadata:
+            items = await self._decode(items)
+
+        if items:
+            await sink.write(items)
+
+    async def _retry(self, sink, handler, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                await handler(*args)
+            except Exception as e:
+                logger.warning("%s failed (attempt %d of %d): %r", type(sink).__name__, attempt + 1,
+                               self.retries + 1, e)
+
+                if attempt < self.retries:
+                    await asyncio.sleep(self.retry_delay * (attempt + 1), loop=self.loop)
+            else:
+                return True
+
+        return False
+
+    async def _consume(self, sink, queue):
+        if not await self._retry(sink, sink.open):
+            logger.error("%s can not be opened, writes will be retried anyway", type(sink).__name__)
+
+        while True:
+            batch = [await queue.get()]
+            deadline = self.loop.time() + self.flush_interval
+
+            while len(batch) < sink.batch_size:
+                timeout = deadline - self.loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout, loop=self.loop))
+                except asyncio.TimeoutError:
+                    break
+
+            if not await self._retry(sink, self._write, sink, batch):
+                logger.error("%s dropped %d torrents after %d attempts: %s", type(sink).__name__, len(batch),
+                             self.retries + 1, ", ".join(item["info_hash"] for item in batch))
+
+            for _ in batch:
+                queue.task_done()
@@ -0,0 +1,45 @@
+import motor.motor_asyncio
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError
+
+from sinks import Sink
+
+
+class MongoSink(Sink):
+    decode_metadata = True
+
+    def __init__(self, db_url, db_name, **kwargs):
+        super().__init__(**kwargs)
+
+        client = motor.motor_asyncio.AsyncIOMotorClient(db_url)
+        self.db = client[db_name]
+
+    async def open(self):
+        index = {
+            "name": "info_hash",
+            "keys": [("info_hash", ASCENDING)],
+            "unique": True
+        }
+
+        coll = self.db.torrents
+        if index["name"] not in await coll.index_information():
+            await coll.create_index(**index)
+
+    async def contains(self, info_hash):
+        return await self.db.torrents.count(filter={"info_hash": info_hash}) > 0
+
+    async def write(self, items):
+        try:
+            await self.db.torrents.insert_many([
+                {
+                    "info_hash": item["info_hash"],
+                    "files": item["decoded"]["files"],
+                    "name": item["decoded"]["name"],
+                    "timestamp": item["timestamp"]
+                }
+                for item in items
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Duplicates are expected (e.g. after retry of partially written batch)
+            if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                raise
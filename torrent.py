@@ -1,14 +1,9 @@
 import asyncio
-from hashlib import sha1
 
 from bencode import bencode, bdecode, decode_dict, bytes_decode_recursive
 from utils import decode_bkeys
 
 
-class BitTorrentProtocolException(Exception):
-    pass
-
-
 class BitTorrentProtocol(asyncio.Protocol):
     def __init__(self, info_hash, result_future):
         self.info_hash = info_hash
@@ -71,11 +66,9 @@ class BitTorrentProtocol(asyncio.Protocol):
                 if len(metadata) == r["total_size"]:
                     self.transport.close()
 
-                    if sha1(metadata).digest() == self.info_hash:
-                        if not self.result_future.done():
-                            self.result_future.set_result(metadata)
-                    else:
-                        raise BitTorrentProtocolException("info_hash != sha1(metadata)")
+                    # sha1 is verified by the crawler, a peer with bad metadata does not stop the other peers
+                    if not self.result_future.done():
+                        self.result_future.set_result(metadata)
 
     def data_received(self, data):
         def parse_message(message):
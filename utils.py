@@ -1,10 +1,12 @@
 import binascii
 import math
+from hashlib import sha1
 from collections import namedtuple
 from heapq import nsmallest
 from secrets import token_bytes, randbits
 from socket import inet_ntoa, inet_aton
 
+from bencode import bdecode
 from chardet import detect
 
 Peer = namedtuple("peer", ["host", "port"])
@@ -76,6 +78,10 @@ def encode_nodes(nodes):
     return result
 
 
+def verify_metadata(info_hash, metadata):
+    return sha1(metadata).digest() == info_hash
+
+
 def hexlify(info_hash):
     return str(binascii.hexlify(info_hash), "utf-8")
 
@@ -92,3 +98,14 @@ def decode_bytes(byte_str):
 
 def decode_bkeys(val_type, value):
     return str(value, "utf-8") if val_type == "key" else value
+
+
+def parse_torrent_metadata(metadata):
+    torrent = bdecode(metadata, decoder=decode_bkeys)
+
+    if "files" in torrent:
+        files = torrent["files"]
+    else:
+        files = [{"length": torrent["length"], "path": [torrent["name"]]}]
+
+    return decode_bytes(files), decode_bytes(torrent["name"])